@@ -1,10 +1,35 @@
+from django import forms
 from django.contrib import admin
 from .models import APIKey
 
 
+class APIKeyForm(forms.ModelForm):
+    paystack_secret = forms.CharField(
+        required=False,
+        widget=forms.PasswordInput,
+        help_text="This client's own Paystack secret key (sk_...). Leave blank to keep the current one.",
+    )
+    clear_paystack_secret = forms.BooleanField(
+        required=False,
+        help_text="Remove the stored secret and use the platform Paystack account again.",
+    )
+
+    class Meta:
+        model = APIKey
+        fields = ['user', 'name', 'is_active']
+
+    def save(self, commit=True):
+        if self.cleaned_data.get('clear_paystack_secret'):
+            self.instance.set_paystack_secret('')
+        elif self.cleaned_data.get('paystack_secret'):
+            self.instance.set_paystack_secret(self.cleaned_data['paystack_secret'])
+        return super().save(commit)
+
+
 @admin.register(APIKey)
 class APIKeyAdmin(admin.ModelAdmin):
-    list_display = ['name', 'user', 'key_preview', 'is_active', 'created_at', 'last_used']
+    form = APIKeyForm
+    list_display = ['name', 'user', 'key_preview', 'has_paystack_secret', 'is_active', 'created_at', 'last_used']
     list_filter = ['is_active', 'created_at']
     search_fields = ['name', 'user__username', 'key']
     readonly_fields = ['key', 'created_at', 'last_used']
@@ -12,4 +37,10 @@ class APIKeyAdmin(admin.ModelAdmin):
     def key_preview(self, obj):
         return f"{obj.key[:20]}..."
 
-    key_preview.short_description = 'API Key'
\ No newline at end of file
+    key_preview.short_description = 'API Key'
+
+    def has_paystack_secret(self, obj):
+        return bool(obj.paystack_secret_encrypted)
+
+    has_paystack_secret.boolean = True
+    has_paystack_secret.short_description = 'Own Paystack account'
\ No newline at end of file
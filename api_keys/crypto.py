@@ -0,0 +1,23 @@
+import base64
+import hashlib
+from functools import lru_cache
+
+from cryptography.fernet import Fernet
+from django.conf import settings
+
+
+@lru_cache(maxsize=1)
+def get_fernet():
+    """Fernet for tenant secrets, keyed by PAYSTACK_CREDENTIALS_KEY (or derived from SECRET_KEY)."""
+    key = settings.PAYSTACK_CREDENTIALS_KEY
+    if not key:
+        key = base64.urlsafe_b64encode(hashlib.sha256(settings.SECRET_KEY.encode('utf-8')).digest())
+    return Fernet(key)
+
+
+def encrypt(value):
+    return get_fernet().encrypt(value.encode('utf-8')).decode('utf-8')
+
+
+def decrypt(token):
+    return get_fernet().decrypt(token.encode('utf-8')).decode('utf-8')
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 15:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_keys', '0002_alter_apikey_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apikey',
+            name='paystack_secret_encrypted',
+            field=models.TextField(blank=True, editable=False),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
 import secrets
+from .crypto import encrypt, decrypt
 
 
 class APIKey(models.Model):
@@ -10,12 +11,23 @@ class APIKey(models.Model):
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     last_used = models.DateTimeField(null=True, blank=True)
+    # This client's own Paystack secret key, Fernet-encrypted. Empty means use the platform key.
+    paystack_secret_encrypted = models.TextField(blank=True, editable=False)
 
     def save(self, *args, **kwargs):
         if not self.key:
             self.key = self.generate_key()
         super().save(*args, **kwargs)
 
+    @property
+    def paystack_secret(self):
+        if not self.paystack_secret_encrypted:
+            return ''
+        return decrypt(self.paystack_secret_encrypted)
+
+    def set_paystack_secret(self, secret):
+        self.paystack_secret_encrypted = encrypt(secret) if secret else ''
+
     @staticmethod
     def generate_key():
         return f"pk_{''.join(secrets.token_hex(32))}"
@@ -1,3 +1,24 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
 
-# Create your tests here.
+from .models import APIKey
+
+
+class PaystackSecretTests(TestCase):
+    def setUp(self):
+        self.api_key = APIKey.objects.create(user=User.objects.create(username='tenant'), name='Tenant')
+
+    def test_secret_is_stored_encrypted(self):
+        self.api_key.set_paystack_secret('sk_test_secret')
+        self.api_key.save()
+
+        stored = APIKey.objects.get(pk=self.api_key.pk)
+        self.assertNotIn('sk_test_secret', stored.paystack_secret_encrypted)
+        self.assertEqual(stored.paystack_secret, 'sk_test_secret')
+
+    def test_blank_secret_clears_it(self):
+        self.api_key.set_paystack_secret('sk_test_secret')
+        self.api_key.set_paystack_secret('')
+
+        self.assertEqual(self.api_key.paystack_secret_encrypted, '')
+        self.assertEqual(self.api_key.paystack_secret, '')
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Transaction
+from .models import Transaction, ArchivedTransaction
 
 
 @admin.register(Transaction)
@@ -12,4 +12,18 @@ class TransactionAdmin(admin.ModelAdmin):
 
     def has_add_permission(self, request):
         # Prevent manual creation - transactions come from webhooks
-        return False
\ No newline at end of file
+        return False
+
+
+@admin.register(ArchivedTransaction)
+class ArchivedTransactionAdmin(admin.ModelAdmin):
+    list_display = ['reference', 'email', 'amount', 'status', 'channel', 'paid_at', 'created_at', 'archived_at']
+    list_filter = ['status', 'channel', 'currency']
+    search_fields = ['reference']
+
+    def has_add_permission(self, request):
+        # Rows only arrive here through the archive_transactions command
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
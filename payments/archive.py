@@ -0,0 +1,166 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction as db_transaction
+from django.utils import timezone
+
+from .models import Transaction, ArchivedTransaction
+
+
+# Fields copied from the hot row into the archive row
+ARCHIVED_FIELDS = [
+    'id', 'user_id', 'api_key_id', 'reference', 'email', 'amount', 'status', 'paystack_reference',
+    'paid_at', 'channel', 'currency', 'customer_code', 'metadata', 'created_at', 'updated_at',
+]
+
+
+def find_by_reference(reference, *conditions, **filters):
+    """Look a transaction up by reference in the hot table, then the archive.
+
+    Extra Q conditions and filters (e.g. api_key=...) apply to both tables.
+    Returns a Transaction, an ArchivedTransaction or None.
+    """
+    for model in (Transaction, ArchivedTransaction):
+        obj = model.objects.filter(*conditions, reference=reference, **filters).first()
+        if obj is not None:
+            return obj
+    return None
+
+
+def archivable_transactions(older_than_days=None):
+    """Terminal transactions older than the configured age."""
+    if older_than_days is None:
+        older_than_days = settings.TRANSACTION_ARCHIVE_AFTER_DAYS
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    return Transaction.objects.filter(
+        status__in=Transaction.TERMINAL_STATUSES,
+        created_at__lt=cutoff,
+    )
+
+
+def table_size(model):
+    """Total on-disk size of a model's table (incl. indexes) in bytes, if the backend can tell us."""
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_total_relation_size(%s)", [model._meta.db_table])
+        return cursor.fetchone()[0]
+
+
+def rows_size(model, ids):
+    """Bytes the given rows take up in a model's table (row data, not indexes), if the backend can tell us."""
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT COALESCE(SUM(pg_column_size(t.*)), 0) FROM {connection.ops.quote_name(model._meta.db_table)} t "
+            "WHERE t.id = ANY(%s)",
+            [list(ids)]
+        )
+        return cursor.fetchone()[0]
+
+
+def time_hot_scan(runs=5):
+    """Median time of the kind of full scan the admin changelist does on the hot table.
+
+    A single run mostly measures whether the table happened to be cached.
+    """
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        Transaction.objects.count()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def archive_batch(older_than_days=None, batch_size=None, after_id=0):
+    """Move one batch of archivable transactions with id > after_id.
+
+    Returns (moved, skipped, moved_bytes, last_id); last_id is None once nothing
+    is left and moved_bytes is None where the backend can't measure row sizes.
+    Copy and delete happen in one database transaction, so an interrupted run
+    leaves every row in exactly one table and the next run simply carries on.
+    Rows whose reference is already in the archive are left in the hot table
+    and counted as skipped - only rows that were actually copied are deleted.
+    """
+    if batch_size is None:
+        batch_size = settings.TRANSACTION_ARCHIVE_BATCH_SIZE
+
+    with db_transaction.atomic():
+        rows = list(
+            archivable_transactions(older_than_days)
+            .filter(id__gt=after_id)
+            .order_by('id')
+            .select_for_update(skip_locked=connection.features.has_select_for_update_skip_locked)
+            .values(*ARCHIVED_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0, 0, 0, None
+
+        taken = set(
+            ArchivedTransaction.objects
+            .filter(reference__in=[row['reference'] for row in rows])
+            .values_list('reference', flat=True)
+        )
+        moved = [row for row in rows if row['reference'] not in taken]
+        moved_ids = [row['id'] for row in moved]
+        moved_bytes = rows_size(Transaction, moved_ids)
+
+        ArchivedTransaction.objects.bulk_create([ArchivedTransaction(**row) for row in moved])
+        Transaction.objects.filter(id__in=moved_ids).delete()
+
+    return len(moved), len(rows) - len(moved), moved_bytes, rows[-1]['id']
+
+
+def reference_exists(reference):
+    """Whether a reference is taken in either the hot table or the archive.
+
+    Each table is only unique on its own, so new transactions must check both.
+    """
+    return (
+        Transaction.objects.filter(reference=reference).exists()
+        or ArchivedTransaction.objects.filter(reference=reference).exists()
+    )
+
+
+def archive_transactions(older_than_days=None, batch_size=None, sleep=None, max_batches=None, stdout=None):
+    """Archive terminal transactions in throttled batches and report the savings.
+
+    bytes_saved is the row data moved out of the hot table. Postgres doesn't
+    shrink a table on DELETE: vacuum makes the space reusable for new rows, and
+    only VACUUM FULL (or pg_repack) gives it back to the OS, so hot_size_before
+    and hot_size_after will usually match.
+    """
+    if sleep is None:
+        sleep = settings.TRANSACTION_ARCHIVE_SLEEP
+
+    report = {
+        'archived': 0,
+        'skipped': 0,
+        'batches': 0,
+        'bytes_saved': 0 if connection.vendor == 'postgresql' else None,
+        'hot_size_before': table_size(Transaction),
+        'hot_scan_before': time_hot_scan(),
+    }
+
+    last_id = 0
+    while max_batches is None or report['batches'] < max_batches:
+        moved, skipped, moved_bytes, last_id = archive_batch(older_than_days, batch_size, after_id=last_id)
+        if last_id is None:
+            break
+        report['archived'] += moved
+        report['skipped'] += skipped
+        if moved_bytes is not None:
+            report['bytes_saved'] += moved_bytes
+        report['batches'] += 1
+        if stdout:
+            stdout.write(f"Batch {report['batches']}: archived {moved} transactions, skipped {skipped}")
+        time.sleep(sleep)
+
+    report['hot_size_after'] = table_size(Transaction)
+    report['hot_scan_after'] = time_hot_scan()
+    report['scan_seconds_saved'] = report['hot_scan_before'] - report['hot_scan_after']
+
+    return report
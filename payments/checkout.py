@@ -0,0 +1,281 @@
+import hashlib
+import hmac
+import ipaddress
+import logging
+import math
+import secrets
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+import orjson
+import requests
+from django.conf import settings
+from django.db import connection, transaction as db_transaction
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Transaction
+from .paystack import PaystackUnavailable
+from .registry import get_paystack
+
+
+logger = logging.getLogger(__name__)
+
+# Columns the worker writes back after an initialize attempt
+RESULT_FIELDS = [
+    'checkout_status', 'authorization_url', 'access_code', 'checkout_attempts',
+    'checkout_error', 'next_attempt_at', 'updated_at',
+]
+
+
+def generate_reference():
+    return f"TXN_{secrets.token_hex(12)}"
+
+
+def is_public_url(url):
+    """Whether url is https and every address its host resolves to is publicly routable.
+
+    Keeps notify_url from pointing the worker at localhost, the private network
+    or cloud metadata endpoints.
+    """
+    try:
+        parts = urlsplit(url)
+        if parts.scheme != 'https' or not parts.hostname:
+            return False
+        addresses = socket.getaddrinfo(parts.hostname, parts.port or 443, proto=socket.IPPROTO_TCP)
+        return all(ipaddress.ip_address(address[4][0].split('%')[0]).is_global for address in addresses)
+    except (OSError, UnicodeError, ValueError):
+        return False
+
+
+def checkout_result(transaction, request=None):
+    """Client-facing body for a checkout, shaped like Paystack's initialize response."""
+    if transaction.checkout_status == 'ready':
+        return {
+            'status': True,
+            'message': 'Authorization URL created',
+            'data': {
+                'authorization_url': transaction.authorization_url,
+                'access_code': transaction.access_code,
+                'reference': transaction.reference,
+            },
+        }
+
+    if transaction.checkout_status == 'error':
+        return {
+            'status': False,
+            'message': transaction.checkout_error or 'Payment could not be initialized',
+            'data': {'reference': transaction.reference},
+        }
+
+    status_url = reverse('checkout-status', args=[transaction.reference])
+    return {
+        'status': True,
+        'message': 'Payment queued',
+        'data': {
+            'reference': transaction.reference,
+            'status_url': request.build_absolute_uri(status_url) if request is not None else status_url,
+        },
+    }
+
+
+def lease_seconds(batch_size, workers):
+    """How long a claim must last to outlive the slowest possible batch.
+
+    Each transaction may need two Paystack calls (initialize, then verify to
+    recover a duplicate), each allowed PAYSTACK_TIMEOUT to connect and again
+    to read; CHECKOUT_CLAIM_TIMEOUT is added on top as a safety margin.
+    """
+    rounds = math.ceil(batch_size / workers)
+    return rounds * 4 * settings.PAYSTACK_TIMEOUT + settings.CHECKOUT_CLAIM_TIMEOUT
+
+
+def claim_batch(batch_size, lease):
+    """Lease up to batch_size queued transactions that are due.
+
+    Returns (claim token, transactions). Pushing next_attempt_at forward keeps
+    other workers off the rows, and if this worker dies they become due again
+    once the lease runs out. Results are only written back while the row still
+    carries our token, so a worker that outlived its lease can't overwrite
+    whoever claimed the row after it.
+    """
+    token = secrets.token_hex(16)
+    now = timezone.now()
+    with db_transaction.atomic():
+        queryset = (
+            Transaction.objects
+            .filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now), checkout_status='queued')
+            .select_for_update(skip_locked=connection.features.has_select_for_update_skip_locked, of=('self',))
+            .order_by('next_attempt_at', 'id')
+        )
+        batch = list(queryset.select_related('api_key')[:batch_size])
+        if batch:
+            Transaction.objects.filter(id__in=[txn.id for txn in batch]).update(
+                next_attempt_at=now + timedelta(seconds=lease),
+                checkout_claim=token
+            )
+    return token, batch
+
+
+def _is_duplicate_reference(result):
+    return result.get('code') == 'duplicate_reference' or 'duplicate' in str(result.get('message', '')).lower()
+
+
+def recover_checkout(paystack, transaction):
+    """Checkout details of a reference Paystack already knows, if it is this transaction.
+
+    An earlier attempt (ours after a timeout, or another worker's) may have
+    created the checkout even though we never saw the response.
+    """
+    result = paystack.verify_transaction(transaction.reference)
+    data = result.get('data') if result.get('status') else None
+    if not isinstance(data, dict):
+        return None
+
+    # Only adopt it if it is the same payment, not someone else's use of the reference
+    email = (data.get('customer') or {}).get('email', '')
+    if email.lower() != transaction.email.lower() or data.get('amount') != int(transaction.amount * 100):
+        return None
+
+    access_code = data.get('access_code')
+    authorization_url = data.get('authorization_url') or (
+        f"https://checkout.paystack.com/{access_code}" if access_code else ''
+    )
+    if not authorization_url:
+        return None
+    return {'authorization_url': authorization_url, 'access_code': access_code or ''}
+
+
+def _checkout_fields(data):
+    # KeyError/TypeError on a success response without checkout details
+    return {'authorization_url': data['authorization_url'], 'access_code': data['access_code']}
+
+
+def initialize(transaction):
+    """Call Paystack for one claimed transaction and record the outcome on it (not saved)."""
+    transaction.checkout_attempts += 1
+    transaction.updated_at = timezone.now()
+
+    try:
+        paystack = get_paystack(transaction.api_key)
+        result = paystack.initialize_transaction(
+            email=transaction.email,
+            amount=transaction.amount,
+            currency=transaction.currency,
+            reference=transaction.reference
+        )
+        checkout = _checkout_fields(result['data']) if result.get('status') else None
+        if checkout is None and _is_duplicate_reference(result):
+            checkout = recover_checkout(paystack, transaction)
+    except Exception as exc:
+        if not isinstance(exc, (PaystackUnavailable, ValueError)):
+            # A malformed response, an unreadable tenant secret, ... - must not take the batch down
+            logger.exception("Initializing checkout %s failed", transaction.reference)
+        # Network trouble, a 5xx/429 or a body we can't use - back off and try again
+        if transaction.checkout_attempts >= settings.CHECKOUT_MAX_ATTEMPTS:
+            transaction.checkout_status = 'error'
+            transaction.checkout_error = f'Paystack unavailable: {exc}'[:255]
+            transaction.next_attempt_at = None
+        else:
+            delay = settings.CHECKOUT_RETRY_DELAY * 2 ** (transaction.checkout_attempts - 1)
+            transaction.checkout_error = str(exc)[:255]
+            transaction.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+        return transaction
+
+    transaction.next_attempt_at = None
+    if checkout is not None:
+        transaction.checkout_status = 'ready'
+        transaction.authorization_url = checkout['authorization_url']
+        transaction.access_code = checkout['access_code']
+        transaction.checkout_error = ''
+    else:
+        # Paystack rejected the request itself (bad email, reference used by another payment, ...)
+        transaction.checkout_status = 'error'
+        transaction.checkout_error = str(result.get('message', 'Payment could not be initialized'))[:255]
+    return transaction
+
+
+def save_results(token, batch):
+    """Write back results for rows we still hold. Returns the transactions that were saved.
+
+    Each row is a single UPDATE of its own, so one row's result is visible (and
+    its lock released) as soon as it is written.
+    """
+    saved = []
+    for transaction in batch:
+        updated = Transaction.objects.filter(id=transaction.id, checkout_claim=token).update(
+            checkout_claim='',
+            **{field: getattr(transaction, field) for field in RESULT_FIELDS}
+        )
+        if updated:
+            saved.append(transaction)
+        else:
+            logger.warning("Lost the claim on %s, dropping this worker's result", transaction.reference)
+    return saved
+
+
+def notify(transaction):
+    """POST the checkout result to the client's notify_url, signed with their API key."""
+    # Checked again here: the host may resolve somewhere else by now
+    if not is_public_url(transaction.notify_url):
+        logger.warning("Not notifying %s: %s is not a public https URL", transaction.reference,
+                       transaction.notify_url)
+        return
+
+    body = orjson.dumps(checkout_result(transaction))
+    signature = hmac.new(transaction.api_key.key.encode('utf-8'), body, hashlib.sha512).hexdigest()
+    try:
+        requests.post(
+            transaction.notify_url,
+            data=body,
+            headers={'Content-Type': 'application/json', 'X-Signature': signature},
+            timeout=settings.PAYSTACK_TIMEOUT,
+            # A redirect could point back inside the network
+            allow_redirects=False
+        )
+    except requests.RequestException:
+        # Best effort - the client can still poll the status URL
+        logger.warning("Checkout notification for %s to %s failed", transaction.reference,
+                       transaction.notify_url, exc_info=True)
+
+
+def process_batch(executor, batch_size, lease):
+    """Claim, initialize and save one batch. Returns the number of transactions handled."""
+    token, batch = claim_batch(batch_size, lease)
+    if not batch:
+        return 0
+
+    # Finish every Paystack call before touching the database again
+    results = list(executor.map(initialize, batch))
+    saved = save_results(token, results)
+
+    finished = [txn for txn in saved if txn.checkout_status != 'queued' and txn.notify_url and txn.api_key]
+    list(executor.map(notify, finished))
+    return len(batch)
+
+
+def run_worker(workers, batch_size, poll_interval, once=False, stop_event=None):
+    """Keep draining the checkout queue until stopped (or, with once=True, until it is empty)."""
+    stop_event = stop_event or threading.Event()
+    lease = lease_seconds(batch_size, workers)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while not stop_event.is_set():
+            try:
+                handled = process_batch(executor, batch_size, lease)
+            except Exception:
+                if once:
+                    raise
+                # e.g. the database went away; claimed rows become due again when the lease runs out
+                logger.exception("Checkout batch failed")
+                stop_event.wait(poll_interval)
+                continue
+            if handled:
+                logger.info("Processed %d queued checkouts", handled)
+            elif once:
+                break
+            else:
+                stop_event.wait(poll_interval)
@@ -0,0 +1,57 @@
+# Lean default shapes for compact responses. Dotted paths reach into nested objects.
+VERIFY_FIELDS = [
+    'id', 'reference', 'status', 'amount', 'currency', 'paid_at', 'channel',
+    'gateway_response', 'customer.email', 'customer.customer_code',
+]
+
+LIST_FIELDS = [
+    'id', 'reference', 'status', 'amount', 'currency', 'paid_at', 'channel', 'customer.email',
+]
+
+
+def _pick(data, path):
+    for key in path:
+        if not isinstance(data, dict) or key not in data:
+            return None, False
+        data = data[key]
+    return data, True
+
+
+def project(data, fields):
+    """Keep only the given (possibly dotted) fields of a dict."""
+    result = {}
+    for field in fields:
+        path = field.split('.')
+        value, found = _pick(data, path)
+        if not found:
+            continue
+        target = result
+        for key in path[:-1]:
+            target = target.setdefault(key, {})
+        target[path[-1]] = value
+    return result
+
+
+def requested_fields(request, default_fields):
+    """Fields to return for this request, or None for the full Paystack payload.
+
+    `?fields=a,b.c` picks fields explicitly, `?compact=true` uses the lean default.
+    """
+    fields = request.query_params.get('fields')
+    if fields:
+        return [field.strip() for field in fields.split(',') if field.strip()]
+    if request.query_params.get('compact', '').lower() in ('1', 'true', 'yes'):
+        return default_fields
+    return None
+
+
+def compact_result(result, fields):
+    """Apply a projection to a Paystack response body, leaving status/message/meta alone."""
+    if fields is None or not isinstance(result.get('data'), (dict, list)):
+        return result
+
+    if isinstance(result['data'], list):
+        data = [project(item, fields) for item in result['data']]
+    else:
+        data = project(result['data'], fields)
+    return {**result, 'data': data}
@@ -0,0 +1,67 @@
+import hashlib
+
+import orjson
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def make_etag(*parts):
+    """Strong ETag from the given parts (the field projection should be one of them)."""
+    digest = hashlib.sha256('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return quote_etag(digest[:32])
+
+
+def transaction_etag(transaction, fields=None):
+    return make_etag(transaction.reference, transaction.status, transaction.updated_at.isoformat(), fields)
+
+
+def etag_matches(request, etag):
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    # If-None-Match uses weak comparison, so ignore any W/ prefix
+    etags = [tag[2:] if tag.startswith('W/') else tag for tag in parse_etags(header)]
+    return '*' in etags or etag in etags
+
+
+def with_etag(response, etag):
+    response['ETag'] = etag
+    # Clients may keep the body but must revalidate before reusing it
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def not_modified(etag):
+    return with_etag(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+
+
+def _verified_key(api_key, reference):
+    return f'paystack:verified:{api_key.pk}:{reference}'
+
+
+def mark_verified(api_key, reference):
+    """Record that the local row was just brought in line with Paystack."""
+    cache.set(_verified_key(api_key, reference), True, settings.VERIFY_MAX_STALENESS)
+
+
+def recently_verified(api_key, reference):
+    return cache.get(_verified_key(api_key, reference), False)
+
+
+def cached_upstream(key, fetch):
+    """Return (payload, etag) for an upstream call, cached for PAYSTACK_CACHE_TTL seconds.
+
+    Failed upstream responses are not cached.
+    """
+    entry = cache.get(key)
+    if entry is not None:
+        return entry
+
+    payload = fetch()
+    etag = make_etag(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS).decode('utf-8'))
+    if payload.get('status'):
+        cache.set(key, (payload, etag), settings.PAYSTACK_CACHE_TTL)
+    return payload, etag
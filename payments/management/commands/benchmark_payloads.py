@@ -0,0 +1,118 @@
+import gzip
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from payments.compact import VERIFY_FIELDS, LIST_FIELDS, compact_result
+from payments.renderers import ORJSONRenderer
+
+
+def sample_transaction(i=0):
+    """A transaction shaped like Paystack's verify/list payload."""
+    return {
+        "id": 4099260516 + i,
+        "domain": "test",
+        "status": "success",
+        "reference": f"TXN_{i:08d}",
+        "receipt_number": None,
+        "amount": 50000,
+        "message": None,
+        "gateway_response": "Successful",
+        "paid_at": "2024-01-01T12:00:00.000Z",
+        "created_at": "2024-01-01T11:59:30.000Z",
+        "channel": "card",
+        "currency": "GHS",
+        "ip_address": "102.176.94.26",
+        "metadata": {"custom_fields": [], "referrer": "https://example.com/checkout"},
+        "log": {
+            "start_time": 1704110370,
+            "time_spent": 30,
+            "attempts": 1,
+            "errors": 0,
+            "success": True,
+            "mobile": False,
+            "input": [],
+            "history": [
+                {"type": "action", "message": "Attempted to pay with card", "time": 25},
+                {"type": "success", "message": "Successfully paid with card", "time": 30},
+            ],
+        },
+        "fees": 975,
+        "fees_split": None,
+        "authorization": {
+            "authorization_code": "AUTH_8dfhjjdt",
+            "bin": "408408",
+            "last4": "4081",
+            "exp_month": "12",
+            "exp_year": "2030",
+            "channel": "card",
+            "card_type": "visa ",
+            "bank": "TEST BANK",
+            "country_code": "GH",
+            "brand": "visa",
+            "reusable": True,
+            "signature": "SIG_yEXu7dLBeqG0kU7g95Ke",
+            "account_name": None,
+        },
+        "customer": {
+            "id": 181873746,
+            "first_name": None,
+            "last_name": None,
+            "email": "customer@example.com",
+            "customer_code": "CUS_1rkzaqsv4rrhqo6",
+            "phone": None,
+            "metadata": None,
+            "risk_action": "default",
+            "international_format_phone": None,
+        },
+        "plan": None,
+        "split": {},
+        "order_id": None,
+        "requested_amount": 50000,
+        "pos_transaction_data": None,
+        "source": None,
+        "fees_breakdown": None,
+        "transaction_date": "2024-01-01T11:59:30.000Z",
+        "plan_object": {},
+        "subaccount": {},
+    }
+
+
+class Command(BaseCommand):
+    help = "Measure payload size and serialization time of full vs compact responses"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=2000)
+        parser.add_argument('--per-page', type=int, default=50)
+
+    def time_render(self, renderer, data, iterations):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            body = renderer.render(data)
+        return body, (time.perf_counter() - start) / iterations
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        verify = {"status": True, "message": "Verification successful", "data": sample_transaction()}
+        listing = {
+            "status": True,
+            "message": "Transactions retrieved",
+            "data": [sample_transaction(i) for i in range(options['per_page'])],
+            "meta": {"total": 1000, "skipped": 0, "perPage": options['per_page'], "page": 1, "pageCount": 20},
+        }
+        cases = [
+            ('verify', verify, VERIFY_FIELDS),
+            ('list', listing, LIST_FIELDS),
+        ]
+
+        self.stdout.write(f"{'payload':<16}{'renderer':<10}{'bytes':>10}{'gzip':>10}{'us/render':>12}")
+        for name, full, fields in cases:
+            compact = compact_result(full, fields)
+            for label, data in ((f'{name} full', full), (f'{name} compact', compact)):
+                for renderer in (JSONRenderer(), ORJSONRenderer()):
+                    body, seconds = self.time_render(renderer, data, iterations)
+                    self.stdout.write(
+                        f"{label:<16}{renderer.__class__.__name__.replace('Renderer', ''):<10}"
+                        f"{len(body):>10}{len(gzip.compress(body)):>10}{seconds * 1e6:>12.1f}"
+                    )
@@ -0,0 +1,128 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from api_keys.models import APIKey
+from payments.models import Transaction
+from payments.search import search_transactions
+
+
+SEED_SQL = """
+INSERT INTO payments_transaction
+    (api_key_id, reference, email, amount, status, paystack_reference, channel,
+     currency, customer_code, checkout_status, authorization_url, access_code,
+     notify_url, checkout_attempts, checkout_error, checkout_claim, created_at, updated_at)
+SELECT (%(keys)s)[1 + (n %% array_length(%(keys)s, 1))],
+       %(prefix)s || lpad(n::text, 10, '0'),
+       'Customer' || (n %% 500000) || '@Example.com',
+       (n %% 100000) / 100.0,
+       (ARRAY['success', 'failed', 'abandoned', 'pending'])[1 + (n %% 4)],
+       '', 'card', 'GHS',
+       'CUS_' || (n %% 500000),
+       -- Django keeps column defaults in Python only, so raw SQL must fill them in
+       'ready', '', '', '', 0, '', '',
+       now() - (n %% 730) * interval '1 day',
+       now()
+FROM generate_series(%(start)s, %(stop)s) AS n
+"""
+
+
+class Command(BaseCommand):
+    help = "Seed transactions and print query plans and timings for the search endpoint's queries"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=0,
+                            help="Transactions to insert before benchmarking (10000000 for the reference run)")
+        parser.add_argument('--tenants', type=int, default=20, help="API keys to spread seeded rows across")
+        parser.add_argument('--batch-size', type=int, default=100000)
+        parser.add_argument('--repeat', type=int, default=20, help="Timed runs per query")
+
+    def handle(self, *args, **options):
+        keys = self.get_api_keys(options['tenants'])
+        if options['rows']:
+            self.seed(keys, options['rows'], options['batch_size'])
+
+        api_key = keys[0]
+        sample = Transaction.objects.filter(api_key=api_key).order_by('id').first()
+        if sample is None:
+            self.stderr.write("No transactions for the benchmark API key - run with --rows first")
+            return
+
+        today = timezone.now().date()
+        cases = {
+            'reference': {'reference': sample.reference},
+            'reference_prefix': {'reference_prefix': sample.reference[:-3]},
+            'email': {'email': sample.email.upper()},
+            'customer_code': {'customer_code': sample.customer_code},
+            'date range + amount': {
+                'created_after': str(today - timedelta(days=7)),
+                'created_before': str(today),
+                'min_amount': '100',
+                'max_amount': '500',
+            },
+        }
+
+        explain_options = {'analyze': True, 'buffers': True} if connection.vendor == 'postgresql' else {}
+        for name, params in cases.items():
+            # Same shape the endpoint runs: first page, newest first
+            queryset = search_transactions(api_key, params).order_by('-created_at', '-id')[:50]
+
+            timings = []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                list(queryset.all())
+                timings.append(time.perf_counter() - start)
+            timings.sort()
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{name}: {params}"))
+            self.stdout.write(
+                f"median {timings[len(timings) // 2] * 1000:.2f}ms, worst {timings[-1] * 1000:.2f}ms"
+            )
+            self.stdout.write(queryset.explain(**explain_options))
+
+    def get_api_keys(self, count):
+        user, _ = User.objects.get_or_create(username='search-benchmark')
+        keys = list(user.api_keys.order_by('id'))
+        for i in range(len(keys), count):
+            keys.append(APIKey.objects.create(user=user, name=f'Search benchmark {i}'))
+        return keys[:count]
+
+    def seed(self, keys, rows, batch_size):
+        prefix = f"BENCH{random.randint(0, 99999):05d}_"
+        start = time.perf_counter()
+        for offset in range(0, rows, batch_size):
+            stop = min(offset + batch_size, rows) - 1
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(SEED_SQL, {
+                        'keys': [key.pk for key in keys], 'prefix': prefix, 'start': offset, 'stop': stop,
+                    })
+            else:
+                now = timezone.now()
+                Transaction.objects.bulk_create([
+                    Transaction(
+                        api_key=keys[n % len(keys)],
+                        reference=f"{prefix}{n:010d}",
+                        email=f"Customer{n % 500000}@Example.com",
+                        amount=(n % 100000) / 100,
+                        status=Transaction.STATUS_CHOICES[n % 4][0],
+                        channel='card',
+                        customer_code=f"CUS_{n % 500000}",
+                    )
+                    for n in range(offset, stop + 1)
+                ])
+                # auto_now_add ignores our value, so spread the dates afterwards
+                Transaction.objects.filter(reference__startswith=prefix, created_at__gte=now).update(
+                    created_at=now - timedelta(days=offset % 730)
+                )
+            self.stdout.write(f"Seeded {stop + 1}/{rows} rows")
+
+        # Fresh planner statistics, otherwise the plans below reflect an empty table
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE payments_transaction")
+        self.stdout.write(f"Seeding took {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,37 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from payments.checkout import run_worker
+
+
+class Command(BaseCommand):
+    help = "Initialize queued (deferred) checkouts with Paystack"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help="Concurrent Paystack calls")
+        parser.add_argument('--batch-size', type=int, default=50, help="Transactions claimed per batch")
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help="Seconds to wait when the queue is empty")
+        parser.add_argument('--once', action='store_true', help="Exit once the queue is empty")
+
+    def handle(self, *args, **options):
+        stop_event = threading.Event()
+
+        def stop(signum, frame):
+            # Finish the batch in flight, then exit
+            self.stdout.write("Stopping checkout worker...")
+            stop_event.set()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        self.stdout.write(self.style.SUCCESS("Checkout worker started"))
+        run_worker(
+            workers=options['workers'],
+            batch_size=options['batch_size'],
+            poll_interval=options['poll_interval'],
+            once=options['once'],
+            stop_event=stop_event,
+        )
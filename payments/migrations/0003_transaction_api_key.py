@@ -0,0 +1,25 @@
+# Generated by Django 5.2.8 on 2026-10-19 15:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_keys', '0003_apikey_paystack_secret_encrypted'),
+        ('payments', '0002_archivedtransaction'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedtransaction',
+            name='api_key',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_transactions', to='api_keys.apikey'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='api_key',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transactions', to='api_keys.apikey'),
+        ),
+    ]
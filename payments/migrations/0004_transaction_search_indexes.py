@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-19 15:34
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_keys', '0003_apikey_paystack_secret_encrypted'),
+        ('payments', '0003_transaction_api_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['api_key', 'reference'], name='txn_key_reference_idx', opclasses=['int8_ops', 'varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(models.F('api_key'), django.db.models.functions.text.Lower('email'), name='txn_key_email_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['api_key', 'customer_code'], name='txn_key_customer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['api_key', 'created_at', 'id'], name='txn_key_created_idx'),
+        ),
+    ]
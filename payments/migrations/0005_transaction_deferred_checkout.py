@@ -0,0 +1,55 @@
+# Generated by Django 5.2.8 on 2026-10-19 15:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_keys', '0003_apikey_paystack_secret_encrypted'),
+        ('payments', '0004_transaction_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='access_code',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='authorization_url',
+            field=models.URLField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='checkout_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='checkout_error',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='checkout_status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('ready', 'Ready'), ('error', 'Error')], default='ready', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='notify_url',
+            field=models.URLField(blank=True, help_text='Client URL to POST the checkout result to'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('checkout_status', 'queued')), fields=['next_attempt_at', 'id'], name='txn_checkout_queue_idx'),
+        ),
+    ]
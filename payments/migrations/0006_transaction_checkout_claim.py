@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 15:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0005_transaction_deferred_checkout'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='checkout_claim',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+    ]
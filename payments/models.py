@@ -1,8 +1,10 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import User
+from api_keys.models import APIKey
 
 
-class Transaction(models.Model):
+class AbstractTransaction(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('success', 'Success'),
@@ -10,7 +12,9 @@ class Transaction(models.Model):
         ('abandoned', 'Abandoned'),
     ]
 
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='transactions', null=True, blank=True)
+    # Statuses that will never change again - safe to move to the archive
+    TERMINAL_STATUSES = ['success', 'failed', 'abandoned']
+
     reference = models.CharField(max_length=100, unique=True)
     email = models.EmailField()
     amount = models.DecimalField(max_digits=12, decimal_places=2)
@@ -21,11 +25,63 @@ class Transaction(models.Model):
     currency = models.CharField(max_length=3, default='GHS')
     customer_code = models.CharField(max_length=100, blank=True)
     metadata = models.JSONField(null=True, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.reference} - {self.status}"
 
     class Meta:
-        ordering = ['-created_at']
\ No newline at end of file
+        abstract = True
+
+
+class Transaction(AbstractTransaction):
+    CHECKOUT_STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('ready', 'Ready'),
+        ('error', 'Error'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='transactions', null=True, blank=True)
+    api_key = models.ForeignKey(APIKey, on_delete=models.SET_NULL, related_name='transactions', null=True, blank=True)
+
+    # Checkout details from Paystack's initialize call. Deferred checkouts start out
+    # 'queued' and are filled in by the run_checkout_worker command.
+    checkout_status = models.CharField(max_length=10, choices=CHECKOUT_STATUS_CHOICES, default='ready')
+    authorization_url = models.URLField(blank=True)
+    access_code = models.CharField(max_length=100, blank=True)
+    notify_url = models.URLField(blank=True, help_text="Client URL to POST the checkout result to")
+    checkout_attempts = models.PositiveSmallIntegerField(default=0)
+    checkout_error = models.CharField(max_length=255, blank=True)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    # Token of the worker currently holding the row; its results are only written while it matches
+    checkout_claim = models.CharField(max_length=32, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        # Search indexes, all led by api_key since every search is scoped to the caller
+        indexes = [
+            # varchar_pattern_ops lets Postgres use the index for LIKE 'prefix%' under any collation
+            models.Index(fields=['api_key', 'reference'], name='txn_key_reference_idx',
+                         opclasses=['int8_ops', 'varchar_pattern_ops']),
+            models.Index(models.F('api_key'), Lower('email'), name='txn_key_email_lower_idx'),
+            models.Index(fields=['api_key', 'customer_code'], name='txn_key_customer_idx'),
+            models.Index(fields=['api_key', 'created_at', 'id'], name='txn_key_created_idx'),
+            # Work queue for the checkout worker; partial so it stays tiny
+            models.Index(fields=['next_attempt_at', 'id'], name='txn_checkout_queue_idx',
+                         condition=models.Q(checkout_status='queued')),
+        ]
+
+
+class ArchivedTransaction(AbstractTransaction):
+    """Cold storage for terminal transactions moved out of the hot table."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_transactions', null=True, blank=True)
+    api_key = models.ForeignKey(APIKey, on_delete=models.SET_NULL, related_name='archived_transactions', null=True, blank=True)
+    # Copied verbatim from the hot row, so no auto_now / auto_now_add here
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
@@ -3,17 +3,34 @@ from django.conf import settings
 from decouple import config
 
 
+class PaystackUnavailable(Exception):
+    """Paystack could not be reached, timed out or returned a server error. Safe to retry."""
+
+
 class PaystackService:
     BASE_URL = "https://api.paystack.co"
 
-    def __init__(self):
-        self.secret_key = config('PAYSTACK_SECRET_KEY', default='')
+    def __init__(self, secret_key=None):
+        self.secret_key = secret_key or config('PAYSTACK_SECRET_KEY', default='')
         self.headers = {
             'Authorization': f'Bearer {self.secret_key}',
             'Content-Type': 'application/json'
         }
+        # Keep-alive connection pool, reused for as long as this client is cached
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+
+    def _request(self, method, url, **kwargs):
+        try:
+            response = self.session.request(method, url, timeout=settings.PAYSTACK_TIMEOUT, **kwargs)
+        except requests.RequestException as exc:
+            raise PaystackUnavailable(str(exc)) from exc
+
+        if response.status_code == 429 or response.status_code >= 500:
+            raise PaystackUnavailable(f"Paystack returned HTTP {response.status_code}")
+        return response.json()
 
-    def initialize_transaction(self, email, amount, reference=None, callback_url=None):
+    def initialize_transaction(self, email, amount, reference=None, callback_url=None, currency=None):
         """Initialize a Paystack transaction"""
         url = f"{self.BASE_URL}/transaction/initialize"
 
@@ -26,18 +43,20 @@ class PaystackService:
             data['reference'] = reference
         if callback_url:
             data['callback_url'] = callback_url
+        if currency:
+            data['currency'] = currency
 
-        response = requests.post(url, json=data, headers=self.headers)
-        return response.json()
+        return self._request('POST', url, json=data)
 
     def verify_transaction(self, reference):
         """Verify a Paystack transaction"""
         url = f"{self.BASE_URL}/transaction/verify/{reference}"
-        response = requests.get(url, headers=self.headers)
-        return response.json()
+        return self._request('GET', url)
 
     def list_transactions(self, page=1, per_page=50):
         """List all transactions"""
         url = f"{self.BASE_URL}/transaction?page={page}&perPage={per_page}"
-        response = requests.get(url, headers=self.headers)
-        return response.json()
\ No newline at end of file
+        return self._request('GET', url)
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,88 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .paystack import PaystackService
+
+
+class PaystackClientRegistry:
+    """Process-wide cache of one pooled PaystackService per tenant.
+
+    Clients are built lazily, evicted least-recently-used first once the
+    registry is full, and dropped after sitting idle for too long. A tenant
+    rotating their secret gets a fresh client on the next lookup.
+    """
+
+    DEFAULT_TENANT = 'default'
+
+    def __init__(self, max_size=None, idle_timeout=None):
+        self.max_size = max_size if max_size is not None else settings.PAYSTACK_CLIENT_CACHE_SIZE
+        self.idle_timeout = idle_timeout if idle_timeout is not None else settings.PAYSTACK_CLIENT_IDLE_TIMEOUT
+        self._clients = OrderedDict()  # tenant -> (fingerprint, client, last_used)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def tenant_for(cls, api_key):
+        """Cache key for an API key: its own id if it has a secret, else the shared platform client."""
+        if api_key is not None and api_key.paystack_secret_encrypted:
+            return api_key.pk
+        return cls.DEFAULT_TENANT
+
+    def get_client(self, api_key=None):
+        tenant = self.tenant_for(api_key)
+        # The encrypted token changes whenever the secret does, so it doubles as a version
+        fingerprint = api_key.paystack_secret_encrypted if tenant != self.DEFAULT_TENANT else ''
+        now = time.monotonic()
+
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._clients.get(tenant)
+            if entry is not None and entry[0] == fingerprint:
+                self._clients[tenant] = (fingerprint, entry[1], now)
+                self._clients.move_to_end(tenant)
+                return entry[1]
+
+        # Decrypt and build outside the lock; a racing request at worst builds a spare client
+        secret = api_key.paystack_secret if fingerprint else None
+        client = PaystackService(secret_key=secret)
+
+        with self._lock:
+            entry = self._clients.get(tenant)
+            if entry is not None and entry[0] == fingerprint:
+                # Another request got there first - use its client, ours was never used
+                client.close()
+                return entry[1]
+            if entry is not None:
+                self._clients.pop(tenant)[1].close()
+            self._clients[tenant] = (fingerprint, client, now)
+            while len(self._clients) > self.max_size:
+                _, (_, evicted, _) = self._clients.popitem(last=False)
+                evicted.close()
+        return client
+
+    def _evict_idle(self, now):
+        # Entries are ordered by last use, so idle ones are at the front
+        while self._clients:
+            tenant, (_, client, last_used) = next(iter(self._clients.items()))
+            if now - last_used < self.idle_timeout:
+                break
+            del self._clients[tenant]
+            client.close()
+
+    def clear(self):
+        with self._lock:
+            for _, client, _ in self._clients.values():
+                client.close()
+            self._clients.clear()
+
+    def __len__(self):
+        return len(self._clients)
+
+
+registry = PaystackClientRegistry()
+
+
+def get_paystack(api_key=None):
+    return registry.get_client(api_key)
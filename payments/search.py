@@ -0,0 +1,83 @@
+from datetime import datetime, time
+
+from django.db.models.functions import Lower
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import serializers
+from rest_framework.pagination import CursorPagination
+
+from .models import Transaction
+
+
+class SearchPagination(CursorPagination):
+    # Keyset pagination walks the (api_key, created_at) index instead of OFFSET-scanning
+    ordering = ('-created_at', '-id')
+    page_size = 50
+    page_size_query_param = 'limit'
+    max_page_size = 200
+
+
+# Same precision as Transaction.amount; also turns away nan, inf and huge exponents
+_amount_field = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+
+def _parse_amount(value, name):
+    try:
+        return _amount_field.to_internal_value(value)
+    except serializers.ValidationError:
+        raise ValueError(f'{name} must be a number with at most 10 digits and 2 decimal places')
+
+
+def _parse_moment(value, name, end_of_day=False):
+    # Plain dates first: parse_datetime('2024-01-01') would give midnight and
+    # make created_before drop the whole day
+    try:
+        day = parse_date(value)
+        moment = None if day else parse_datetime(value)
+    except ValueError:
+        day = moment = None
+    if day is not None:
+        moment = datetime.combine(day, time.max if end_of_day else time.min)
+    elif moment is None:
+        raise ValueError(f'{name} must be an ISO date or datetime')
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def search_transactions(api_key, params):
+    """Filter the caller's transactions. Raises ValueError on bad parameters.
+
+    Every filter is combined with api_key so each lookup hits one of the
+    composite indexes on Transaction:
+      reference         -> (api_key, reference)
+      reference_prefix  -> (api_key, reference varchar_pattern_ops)
+      email             -> (api_key, lower(email))
+      customer_code     -> (api_key, customer_code)
+      dates / no filter -> (api_key, created_at)
+    """
+    queryset = Transaction.objects.filter(api_key=api_key)
+
+    if params.get('reference'):
+        queryset = queryset.filter(reference=params['reference'])
+    if params.get('reference_prefix'):
+        queryset = queryset.filter(reference__startswith=params['reference_prefix'])
+    if params.get('email'):
+        # Compare against lower(email) rather than using iexact, which Postgres runs as UPPER(..) LIKE
+        queryset = queryset.alias(email_lower=Lower('email')).filter(email_lower=params['email'].lower())
+    if params.get('customer_code'):
+        queryset = queryset.filter(customer_code=params['customer_code'])
+    if params.get('status'):
+        queryset = queryset.filter(status=params['status'])
+    if params.get('min_amount'):
+        queryset = queryset.filter(amount__gte=_parse_amount(params['min_amount'], 'min_amount'))
+    if params.get('max_amount'):
+        queryset = queryset.filter(amount__lte=_parse_amount(params['max_amount'], 'max_amount'))
+    if params.get('created_after'):
+        queryset = queryset.filter(created_at__gte=_parse_moment(params['created_after'], 'created_after'))
+    if params.get('created_before'):
+        queryset = queryset.filter(
+            created_at__lte=_parse_moment(params['created_before'], 'created_before', end_of_day=True)
+        )
+
+    return queryset
@@ -0,0 +1,27 @@
+from decimal import Decimal
+
+from rest_framework import serializers
+from .checkout import is_public_url
+from .models import Transaction
+
+
+class TransactionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Transaction
+        fields = [
+            'id', 'reference', 'email', 'amount', 'currency', 'status', 'channel',
+            'customer_code', 'paystack_reference', 'paid_at', 'created_at', 'updated_at',
+        ]
+
+
+class InitializePaymentSerializer(serializers.Serializer):
+    email = serializers.EmailField()
+    amount = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=Decimal('0.01'))
+    currency = serializers.CharField(max_length=3, default='GHS')
+    reference = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    notify_url = serializers.URLField(required=False, allow_blank=True)
+
+    def validate_notify_url(self, value):
+        if value and not is_public_url(value):
+            raise serializers.ValidationError('notify_url must be an https URL on a public host')
+        return value
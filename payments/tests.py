@@ -1,3 +1,568 @@
-from django.test import TestCase
+import hashlib
+import hmac
+import itertools
+import json
+import os
+import socket
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api_keys.models import APIKey
+from .archive import archive_transactions, find_by_reference, time_hot_scan
+from .compact import VERIFY_FIELDS, compact_result, project, requested_fields
+from .checkout import claim_batch, initialize, notify, run_worker, save_results
+from .paystack import PaystackUnavailable
+from .models import Transaction, ArchivedTransaction
+from .registry import PaystackClientRegistry
+from .renderers import ORJSONRenderer
+
+
+def make_transaction(reference, status='success', days_old=400, **kwargs):
+    transaction = Transaction.objects.create(
+        reference=reference, email='customer@example.com', amount=50, status=status, **kwargs
+    )
+    Transaction.objects.filter(pk=transaction.pk).update(created_at=timezone.now() - timedelta(days=days_old))
+    return transaction
+
+
+def make_api_key(name, secret=''):
+    user = User.objects.create(username=name)
+    api_key = APIKey(user=user, name=name)
+    api_key.set_paystack_secret(secret)
+    api_key.save()
+    return api_key
+
+
+class ArchiveTests(TestCase):
+    def archive(self, **kwargs):
+        return archive_transactions(older_than_days=365, sleep=0, **kwargs)
+
+    def test_moves_old_terminal_transactions_in_batches(self):
+        for i in range(7):
+            make_transaction(f'OLD{i}')
+        make_transaction('PENDING', status='pending')
+        make_transaction('RECENT', days_old=10)
+
+        report = self.archive(batch_size=3)
+
+        self.assertEqual(report['archived'], 7)
+        self.assertEqual(report['batches'], 3)
+        self.assertEqual(set(Transaction.objects.values_list('reference', flat=True)), {'PENDING', 'RECENT'})
+        self.assertIsInstance(find_by_reference('OLD3'), ArchivedTransaction)
+
+    def test_reference_already_archived_is_kept_in_hot_table(self):
+        make_transaction('R1')
+        self.archive()
+        make_transaction('R1', status='failed')
+
+        report = self.archive()
+
+        self.assertEqual(report['archived'], 0)
+        self.assertEqual(report['skipped'], 1)
+        self.assertEqual(Transaction.objects.get(reference='R1').status, 'failed')
+        self.assertEqual(ArchivedTransaction.objects.get(reference='R1').status, 'success')
+
+    def test_reports_moved_row_bytes_on_postgres(self):
+        for i in range(3):
+            make_transaction(f'OLD{i}')
+
+        report = self.archive()
+
+        if connection.vendor == 'postgresql':
+            self.assertGreater(report['bytes_saved'], 0)
+        else:
+            self.assertIsNone(report['bytes_saved'])
+
+    def test_hot_scan_time_is_median_of_runs(self):
+        with mock.patch('payments.archive.time.perf_counter', side_effect=[0, 9, 0, 1, 0, 2]):
+            self.assertEqual(time_hot_scan(runs=3), 2)
+
+    def test_initialize_rejects_archived_reference(self):
+        user = User.objects.create(username='tenant')
+        api_key = APIKey.objects.create(user=user, name='Tenant')
+        make_transaction('R1')
+        self.archive()
+
+        response = self.client.post(
+            '/api/payments/initialize/',
+            {'email': 'customer@example.com', 'amount': 50, 'reference': 'R1', 'deferred': True},
+            content_type='application/json',
+            HTTP_X_API_KEY=api_key.key
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Transaction.objects.filter(reference='R1').exists())
+
+
+@mock.patch.dict(os.environ, {'PAYSTACK_SECRET_KEY': 'sk_platform'})
+class WebhookTests(TestCase):
+    def setUp(self):
+        self.tenant_a = make_api_key('tenant-a', 'sk_tenant_a')
+        self.tenant_b = make_api_key('tenant-b', 'sk_tenant_b')
+        self.platform_client = make_api_key('platform-client')
+
+    def post_event(self, reference, secret, url='/api/payments/webhook/'):
+        body = json.dumps({'event': 'charge.success', 'data': {'reference': reference}}).encode('utf-8')
+        signature = hmac.new(secret.encode('utf-8'), body, hashlib.sha512).hexdigest()
+        return self.client.post(url, body, content_type='application/json', HTTP_X_PAYSTACK_SIGNATURE=signature)
+
+    def status_of(self, reference):
+        return Transaction.objects.get(reference=reference).status
+
+    def test_tenant_event_on_shared_url_uses_tenant_secret(self):
+        make_transaction('A1', status='pending', api_key=self.tenant_a)
+
+        response = self.post_event('A1', 'sk_tenant_a')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.status_of('A1'), 'success')
+
+    def test_tenant_cannot_mark_another_tenants_transaction_paid(self):
+        make_transaction('B1', status='pending', api_key=self.tenant_b)
+
+        response = self.post_event('B1', 'sk_tenant_a', url=f'/api/payments/webhook/{self.tenant_a.pk}/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.status_of('B1'), 'pending')
+
+    def test_tenant_cannot_mark_platform_transaction_paid(self):
+        make_transaction('P1', status='pending', api_key=self.platform_client)
+
+        self.post_event('P1', 'sk_tenant_a', url=f'/api/payments/webhook/{self.tenant_a.pk}/')
+
+        self.assertEqual(self.status_of('P1'), 'pending')
+
+    def test_platform_key_cannot_touch_tenant_transaction(self):
+        make_transaction('A1', status='pending', api_key=self.tenant_a)
+
+        self.post_event('A1', 'sk_platform', url=f'/api/payments/webhook/{self.platform_client.pk}/')
+
+        self.assertEqual(self.status_of('A1'), 'pending')
+
+    def test_platform_event_updates_platform_transaction(self):
+        make_transaction('P1', status='pending', api_key=self.platform_client)
+
+        self.post_event('P1', 'sk_platform')
+
+        self.assertEqual(self.status_of('P1'), 'success')
+
+    def test_wrong_secret_is_rejected(self):
+        make_transaction('A1', status='pending', api_key=self.tenant_a)
+
+        response = self.post_event('A1', 'sk_tenant_b')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.status_of('A1'), 'pending')
+
+
+class PaystackClientRegistryTests(TestCase):
+    def test_reuses_client_per_tenant(self):
+        registry = PaystackClientRegistry(max_size=10, idle_timeout=60)
+        tenant = make_api_key('tenant', 'sk_tenant')
+        platform = make_api_key('platform-client')
+
+        client = registry.get_client(tenant)
+
+        self.assertIs(registry.get_client(tenant), client)
+        self.assertEqual(client.secret_key, 'sk_tenant')
+        self.assertIsNot(registry.get_client(platform), client)
+
+    def test_rotated_secret_gets_new_client(self):
+        registry = PaystackClientRegistry(max_size=10, idle_timeout=60)
+        tenant = make_api_key('tenant', 'sk_old')
+        old_client = registry.get_client(tenant)
+
+        tenant.set_paystack_secret('sk_new')
+        tenant.save()
+        new_client = registry.get_client(tenant)
+
+        self.assertIsNot(new_client, old_client)
+        self.assertEqual(new_client.secret_key, 'sk_new')
+        self.assertEqual(len(registry), 1)
+
+    def test_evicts_least_recently_used(self):
+        registry = PaystackClientRegistry(max_size=2, idle_timeout=60)
+        first, second, third = (make_api_key(f'tenant-{i}', f'sk_{i}') for i in range(3))
+        first_client = registry.get_client(first)
+        registry.get_client(second)
+        registry.get_client(first)
+
+        registry.get_client(third)
+
+        self.assertEqual(len(registry), 2)
+        self.assertIs(registry.get_client(first), first_client)
+
+    def test_evicts_idle_clients(self):
+        registry = PaystackClientRegistry(max_size=10, idle_timeout=60)
+        tenant = make_api_key('tenant', 'sk_tenant')
+        other = make_api_key('other', 'sk_other')
+
+        with mock.patch('payments.registry.time.monotonic', return_value=1000):
+            registry.get_client(tenant)
+        with mock.patch('payments.registry.time.monotonic', return_value=1100):
+            registry.get_client(other)
+
+        self.assertEqual(len(registry), 1)
+
+
+class VerifyConditionalTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.api_key = make_api_key('tenant')
+        make_transaction('R1', status='pending', days_old=0, api_key=self.api_key)
+
+    def verify(self, api_key, etag=None, result_status='pending'):
+        headers = {'HTTP_X_API_KEY': api_key.key}
+        if etag:
+            headers['HTTP_IF_NONE_MATCH'] = etag
+        result = {'status': True, 'message': 'Verification successful',
+                  'data': {'reference': 'R1', 'status': result_status}}
+        with mock.patch('payments.paystack.PaystackService.verify_transaction', return_value=result) as upstream:
+            response = self.client.get('/api/payments/verify/R1/', **headers)
+        return response, upstream.call_count
+
+    def test_pending_poll_within_staleness_window_skips_paystack(self):
+        response, _ = self.verify(self.api_key)
+
+        with self.assertNumQueries(2):  # API key, transaction
+            poll, upstream_calls = self.verify(self.api_key, etag=response['ETag'])
+
+        self.assertEqual(poll.status_code, 304)
+        self.assertEqual(upstream_calls, 0)
+
+    def test_pending_poll_after_staleness_window_asks_paystack(self):
+        response, _ = self.verify(self.api_key)
+        cache.clear()
+
+        poll, upstream_calls = self.verify(self.api_key, etag=response['ETag'], result_status='success')
+
+        self.assertEqual(poll.status_code, 200)
+        self.assertEqual(upstream_calls, 1)
+        self.assertEqual(Transaction.objects.get(reference='R1').status, 'success')
+
+    def test_other_tenant_gets_no_etag_for_foreign_reference(self):
+        response, _ = self.verify(self.api_key)
+        other = make_api_key('other')
+
+        poll, upstream_calls = self.verify(other, etag=response['ETag'])
+
+        self.assertEqual(poll.status_code, 200)
+        self.assertNotIn('ETag', poll)
+        self.assertEqual(upstream_calls, 1)
+
+
+class CompactResponseTests(TestCase):
+    payload = {
+        'id': 1, 'reference': 'R1', 'status': 'success', 'log': {'history': []},
+        'customer': {'email': 'customer@example.com', 'phone': None}, 'authorization': None,
+    }
+
+    def fields_for(self, **params):
+        return requested_fields(Request(APIRequestFactory().get('/', params)), VERIFY_FIELDS)
+
+    def test_project_keeps_dotted_paths(self):
+        self.assertEqual(
+            project(self.payload, ['reference', 'customer.email']),
+            {'reference': 'R1', 'customer': {'email': 'customer@example.com'}}
+        )
+
+    def test_project_skips_missing_keys_and_non_dict_parents(self):
+        self.assertEqual(
+            project(self.payload, ['missing', 'customer.missing', 'authorization.bin', 'reference.x']), {}
+        )
+        # Present but null values are kept
+        self.assertEqual(project(self.payload, ['customer.phone']), {'customer': {'phone': None}})
+
+    def test_requested_fields(self):
+        self.assertIsNone(self.fields_for())
+        self.assertIsNone(self.fields_for(compact='false'))
+        self.assertEqual(self.fields_for(compact='true'), VERIFY_FIELDS)
+        # An explicit field list wins over compact
+        self.assertEqual(self.fields_for(fields=' reference, ,customer.email', compact='true'),
+                         ['reference', 'customer.email'])
+
+    def test_compact_result_on_dict_and_list_data(self):
+        single = {'status': True, 'message': 'ok', 'data': self.payload}
+        listing = {'status': True, 'data': [self.payload, self.payload], 'meta': {'total': 2}}
+
+        self.assertEqual(compact_result(single, ['reference']), {'status': True, 'message': 'ok',
+                                                                 'data': {'reference': 'R1'}})
+        self.assertEqual(compact_result(listing, ['id']), {'status': True, 'data': [{'id': 1}, {'id': 1}],
+                                                           'meta': {'total': 2}})
+        self.assertIs(compact_result(single, None), single)
+        error = {'status': False, 'message': 'Transaction reference not found', 'data': None}
+        self.assertIs(compact_result(error, ['reference']), error)
+
+
+class ORJSONTests(TestCase):
+    def test_renders_like_drf_json_renderer(self):
+        data = {'amount': Decimal('50.10'), 'paid_at': timezone.now(), 'items': ('a', 'b'), 1: 'int key'}
+
+        self.assertEqual(json.loads(ORJSONRenderer().render(data)), json.loads(JSONRenderer().render(data)))
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+    def test_malformed_json_body_is_a_400(self):
+        api_key = make_api_key('tenant')
+
+        response = self.client.post('/api/payments/initialize/', '{"email": ', content_type='application/json',
+                                    HTTP_X_API_KEY=api_key.key)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('JSON parse error', response.json()['detail'])
+
+    def test_parses_json_body(self):
+        api_key = make_api_key('tenant')
+
+        response = self.client.post('/api/payments/initialize/', {'email': 'customer@example.com', 'amount': 50,
+                                    'deferred': True}, content_type='application/json', HTTP_X_API_KEY=api_key.key)
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.api_key = make_api_key('tenant')
+
+    def search(self, **params):
+        return self.client.get('/api/payments/search/', params, HTTP_X_API_KEY=self.api_key.key)
+
+    def test_created_before_plain_date_includes_whole_day(self):
+        transaction = make_transaction('R1', days_old=0, api_key=self.api_key)
+        today = timezone.localdate(transaction.created_at).isoformat()
+
+        response = self.search(created_after=today, created_before=today)
+
+        self.assertEqual([row['reference'] for row in response.json()['results']], ['R1'])
+
+    def test_created_before_datetime_is_exact(self):
+        make_transaction('R1', days_old=0, api_key=self.api_key)
+
+        response = self.search(created_before='2000-01-01T12:00:00')
+
+        self.assertEqual(response.json()['results'], [])
+
+    def test_invalid_date_is_rejected(self):
+        self.assertEqual(self.search(created_before='2024-02-30').status_code, 400)
+        self.assertEqual(self.search(created_before='yesterday').status_code, 400)
+
+    def test_invalid_amount_is_rejected(self):
+        for value in ('nan', 'sNaN', 'Infinity', '-inf', '1e999999', '12345678901', '1.005', 'abc'):
+            with self.subTest(value=value):
+                self.assertEqual(self.search(min_amount=value).status_code, 400)
+                self.assertEqual(self.search(max_amount=value).status_code, 400)
+
+    def test_amount_range(self):
+        make_transaction('R1', days_old=0, api_key=self.api_key)
+
+        self.assertEqual(len(self.search(min_amount='49.99', max_amount='50').json()['results']), 1)
+        self.assertEqual(self.search(min_amount='50.01').json()['results'], [])
+
+
+class DeferredCheckoutViewTests(TestCase):
+    def setUp(self):
+        self.api_key = make_api_key('tenant')
+
+    def initialize(self, **data):
+        payload = {'email': 'customer@example.com', 'amount': 50, 'deferred': True, **data}
+        return self.client.post('/api/payments/initialize/', payload, content_type='application/json',
+                                HTTP_X_API_KEY=self.api_key.key)
+
+    def test_queues_transaction_and_returns_status_url(self):
+        response = self.initialize()
+
+        self.assertEqual(response.status_code, 202)
+        transaction = Transaction.objects.get(reference=response.json()['data']['reference'])
+        self.assertEqual(transaction.checkout_status, 'queued')
+        self.assertEqual(transaction.api_key, self.api_key)
+
+    def test_invalid_input_is_rejected(self):
+        for data in ({'amount': 'abc'}, {'amount': -5}, {'email': 'not-an-email'},
+                     {'currency': 'GHSX'}, {'notify_url': 'nope'}):
+            with self.subTest(data=data):
+                self.assertEqual(self.initialize(**data).status_code, 400)
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_notify_url_must_be_public_https(self):
+        for url in ('http://example.com/hook', 'https://localhost/hook', 'https://127.0.0.1/hook',
+                    'https://10.0.0.5/hook', 'https://169.254.169.254/latest/meta-data/', 'https://[::1]/hook'):
+            with self.subTest(url=url):
+                self.assertEqual(self.initialize(notify_url=url).status_code, 400)
+
+        public = [(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP, '', ('93.184.215.14', 443))]
+        with mock.patch('payments.checkout.socket.getaddrinfo', return_value=public):
+            self.assertEqual(self.initialize(notify_url='https://example.com/hook').status_code, 202)
+
+    def test_long_poll_keeps_connection_without_pool(self):
+        reference = self.initialize().json()['data']['reference']
+
+        with mock.patch('payments.views.time.sleep') as sleep, \
+                mock.patch('payments.views.time.monotonic', side_effect=itertools.count(step=0.6)), \
+                mock.patch.object(connection, 'close') as close:
+            response = self.client.get(f'/api/payments/checkout/{reference}/', {'wait': 1},
+                                       HTTP_X_API_KEY=self.api_key.key)
+
+        self.assertEqual(response.status_code, 202)
+        sleep.assert_called_once()
+        close.assert_not_called()
+
+    @override_settings(CHECKOUT_LONG_POLL_MAX=1)
+    def test_non_finite_wait_does_not_block(self):
+        reference = self.initialize().json()['data']['reference']
+
+        for wait in ('nan', 'inf', 'abc'):
+            with self.subTest(wait=wait):
+                with mock.patch('payments.views.time.sleep') as sleep:
+                    response = self.client.get(f'/api/payments/checkout/{reference}/', {'wait': wait},
+                                               HTTP_X_API_KEY=self.api_key.key)
+                self.assertEqual(response.status_code, 202)
+                sleep.assert_not_called()
+
+
+def paystack_checkout(reference):
+    return {'status': True, 'message': 'Authorization URL created', 'data': {
+        'authorization_url': f'https://checkout.paystack.com/{reference}', 'access_code': reference,
+        'reference': reference,
+    }}
+
+
+@override_settings(CHECKOUT_RETRY_DELAY=0, CHECKOUT_MAX_ATTEMPTS=3)
+class CheckoutWorkerTests(TestCase):
+    def setUp(self):
+        self.api_key = make_api_key('tenant')
+        self.transaction = Transaction.objects.create(
+            api_key=self.api_key, reference='Q1', email='customer@example.com', amount=50, checkout_status='queued'
+        )
+
+    def patch_paystack(self, initialize=None, verify=None):
+        patches = [
+            mock.patch('payments.paystack.PaystackService.initialize_transaction', side_effect=initialize),
+            mock.patch('payments.paystack.PaystackService.verify_transaction', side_effect=verify),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_transient_failure_is_retried(self):
+        self.patch_paystack(initialize=[PaystackUnavailable('HTTP 503'), paystack_checkout('Q1')])
+
+        run_worker(workers=2, batch_size=10, poll_interval=0, once=True)
+
+        self.transaction.refresh_from_db()
+        self.assertEqual(self.transaction.checkout_status, 'ready')
+        self.assertEqual(self.transaction.checkout_attempts, 2)
+        self.assertEqual(self.transaction.checkout_claim, '')
+
+    def test_malformed_response_is_retried_without_losing_the_rest_of_the_batch(self):
+        Transaction.objects.create(
+            api_key=self.api_key, reference='Q2', email='customer@example.com', amount=50, checkout_status='queued'
+        )
+        calls = []
+
+        def initialize(reference, **kwargs):
+            calls.append(reference)
+            if reference == 'Q1' and calls.count('Q1') == 1:
+                return {'status': True}
+            return paystack_checkout(reference)
+
+        self.patch_paystack(initialize=initialize)
+
+        with self.assertLogs('payments.checkout', 'ERROR'):
+            run_worker(workers=2, batch_size=10, poll_interval=0, once=True)
+
+        for transaction in Transaction.objects.filter(reference__in=['Q1', 'Q2']):
+            self.assertEqual(transaction.checkout_status, 'ready')
+            self.assertEqual(transaction.checkout_claim, '')
+        self.assertEqual(Transaction.objects.get(reference='Q1').checkout_attempts, 2)
+        self.assertEqual(Transaction.objects.get(reference='Q2').checkout_attempts, 1)
+
+    def test_unreadable_tenant_secret_ends_in_error(self):
+        # Encrypted under a credentials key that has since been rotated away
+        APIKey.objects.filter(pk=self.api_key.pk).update(paystack_secret_encrypted='gAAAAAB-not-a-valid-token')
+
+        with self.assertLogs('payments.checkout', 'ERROR'):
+            run_worker(workers=2, batch_size=10, poll_interval=0, once=True)
+
+        self.transaction.refresh_from_db()
+        self.assertEqual(self.transaction.checkout_status, 'error')
+        self.assertEqual(self.transaction.checkout_claim, '')
+
+    def test_gives_up_after_max_attempts(self):
+        self.patch_paystack(initialize=PaystackUnavailable('timed out'))
+
+        run_worker(workers=2, batch_size=10, poll_interval=0, once=True)
+
+        self.transaction.refresh_from_db()
+        self.assertEqual(self.transaction.checkout_status, 'error')
+        self.assertEqual(self.transaction.checkout_attempts, 3)
+
+    def test_duplicate_reference_after_timeout_recovers_existing_checkout(self):
+        duplicate = {'status': False, 'message': 'Duplicate Transaction Reference'}
+        existing = {'status': True, 'data': {
+            'reference': 'Q1', 'status': 'abandoned', 'amount': 5000, 'access_code': 'existing_code',
+            'customer': {'email': 'Customer@Example.com'},
+        }}
+        self.patch_paystack(initialize=[PaystackUnavailable('read timed out'), duplicate], verify=[existing])
+
+        run_worker(workers=2, batch_size=10, poll_interval=0, once=True)
+
+        self.transaction.refresh_from_db()
+        self.assertEqual(self.transaction.checkout_status, 'ready')
+        self.assertEqual(self.transaction.access_code, 'existing_code')
+        self.assertEqual(self.transaction.authorization_url, 'https://checkout.paystack.com/existing_code')
+
+    def test_duplicate_reference_of_another_payment_is_an_error(self):
+        duplicate = {'status': False, 'message': 'Duplicate Transaction Reference'}
+        other = {'status': True, 'data': {
+            'reference': 'Q1', 'amount': 999, 'access_code': 'x', 'customer': {'email': 'someone@else.com'},
+        }}
+        self.patch_paystack(initialize=[duplicate], verify=[other])
+
+        run_worker(workers=2, batch_size=10, poll_interval=0, once=True)
+
+        self.transaction.refresh_from_db()
+        self.assertEqual(self.transaction.checkout_status, 'error')
+
+    def test_result_after_lease_expiry_does_not_overwrite_new_claim(self):
+        self.patch_paystack(initialize=[paystack_checkout('Q1'), PaystackUnavailable('HTTP 502')])
+        first_token, first_batch = claim_batch(10, lease=60)
+
+        # The first worker stalls past its lease and a second worker takes the row over
+        Transaction.objects.filter(pk=self.transaction.pk).update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        second_token, second_batch = claim_batch(10, lease=60)
+        self.assertEqual([txn.pk for txn in second_batch], [self.transaction.pk])
+
+        self.assertEqual(save_results(first_token, [initialize(txn) for txn in first_batch]), [])
+        self.transaction.refresh_from_db()
+        self.assertEqual(self.transaction.checkout_status, 'queued')
+
+        self.assertEqual(len(save_results(second_token, [initialize(txn) for txn in second_batch])), 1)
+        self.transaction.refresh_from_db()
+        self.assertEqual(self.transaction.checkout_error, 'HTTP 502')
+
+    def test_notify_skips_url_that_now_resolves_internally(self):
+        self.transaction.notify_url = 'https://hooks.example.com/checkout'
+        internal = [(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP, '', ('10.0.0.5', 443))]
+
+        with mock.patch('payments.checkout.socket.getaddrinfo', return_value=internal), \
+                mock.patch('payments.checkout.requests.post') as post, self.assertLogs('payments.checkout'):
+            notify(self.transaction)
+
+        post.assert_not_called()
+
+    def test_claimed_rows_are_skipped_until_lease_expires(self):
+        claim_batch(10, lease=60)
+
+        _, batch = claim_batch(10, lease=60)
+
+        self.assertEqual(batch, [])
@@ -1,9 +1,13 @@
 from django.urls import path
-from .views import InitializePaymentView, VerifyPaymentView, ListTransactionsView, PaystackWebhookView
+from .views import InitializePaymentView, CheckoutStatusView, VerifyPaymentView, ListTransactionsView, \
+    SearchTransactionsView, PaystackWebhookView
 
 urlpatterns = [
     path('initialize/', InitializePaymentView.as_view(), name='initialize-payment'),
+    path('checkout/<str:reference>/', CheckoutStatusView.as_view(), name='checkout-status'),
     path('verify/<str:reference>/', VerifyPaymentView.as_view(), name='verify-payment'),
     path('transactions/', ListTransactionsView.as_view(), name='list-transactions'),
+    path('search/', SearchTransactionsView.as_view(), name='search-transactions'),
     path('webhook/', PaystackWebhookView.as_view(), name='paystack-webhook'),
+    path('webhook/<int:api_key_id>/', PaystackWebhookView.as_view(), name='paystack-tenant-webhook'),
 ]
\ No newline at end of file
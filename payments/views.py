@@ -3,14 +3,48 @@ from rest_framework.response import Response
 from rest_framework import status
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-from .paystack import PaystackService
+from .registry import PaystackClientRegistry, get_paystack
+from .paystack import PaystackUnavailable
+from .checkout import generate_reference, checkout_result
 from .models import Transaction
+from .archive import find_by_reference, reference_exists
+from .compact import VERIFY_FIELDS, LIST_FIELDS, requested_fields, compact_result
+from .search import SearchPagination, search_transactions
+from .serializers import TransactionSerializer, InitializePaymentSerializer
+from .conditional import make_etag, transaction_etag, etag_matches, with_etag, not_modified, cached_upstream, \
+    mark_verified, recently_verified
 from api_keys.models import APIKey
 import hmac
 import hashlib
+import math
+import time
+from django.conf import settings
+from django.db import IntegrityError, connection
+from django.db.models import Q
 from decouple import config
 
 
+PAYSTACK_UNAVAILABLE = {'error': 'Paystack is unavailable, please retry'}
+
+COMPACT_PARAMETERS = [
+    openapi.Parameter(
+        'fields',
+        openapi.IN_QUERY,
+        description="Comma-separated fields to return from each transaction, e.g. reference,status,customer.email",
+        type=openapi.TYPE_STRING,
+        required=False
+    ),
+    openapi.Parameter(
+        'compact',
+        openapi.IN_QUERY,
+        description="Return a lean default shape instead of the full Paystack payload",
+        type=openapi.TYPE_BOOLEAN,
+        required=False,
+        default=False
+    ),
+]
+
+
 class InitializePaymentView(APIView):
     @swagger_auto_schema(
         operation_description="Initialize a new payment transaction with Paystack",
@@ -39,6 +73,17 @@ class InitializePaymentView(APIView):
                     description='Unique transaction reference (optional)',
                     example='TXN_123456'
                 ),
+                'deferred': openapi.Schema(
+                    type=openapi.TYPE_BOOLEAN,
+                    description='Return at once with a status URL and initialize with Paystack in the background',
+                    example=True
+                ),
+                'notify_url': openapi.Schema(
+                    type=openapi.TYPE_STRING,
+                    description='Deferred only: https URL on a public host to POST the checkout result to, '
+                                'signed with X-Signature (HMAC-SHA512 of the body keyed with your API key)',
+                    example='https://example.com/hooks/checkout'
+                ),
             },
         ),
         responses={
@@ -56,8 +101,22 @@ class InitializePaymentView(APIView):
                     }
                 }
             ),
+            202: openapi.Response(
+                description="Payment queued (deferred mode)",
+                examples={
+                    "application/json": {
+                        "status": True,
+                        "message": "Payment queued",
+                        "data": {
+                            "reference": "TXN_xxx",
+                            "status_url": "https://paystack-saas.onrender.com/api/payments/checkout/TXN_xxx/"
+                        }
+                    }
+                }
+            ),
             400: "Bad Request - Missing or invalid data",
-            401: "Unauthorized - Invalid API key"
+            401: "Unauthorized - Invalid API key",
+            502: "Paystack is unavailable"
         }
     )
     def post(self, request):
@@ -80,35 +139,78 @@ class InitializePaymentView(APIView):
             )
 
         # Get payment data
-        email = request.data.get('email')
-        amount = request.data.get('amount')
-        currency = request.data.get('currency', 'GHS')
-        reference = request.data.get('reference')
-
-        if not email or not amount:
+        if not request.data.get('email') or not request.data.get('amount'):
             return Response(
                 {'error': 'Email and amount are required'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        serializer = InitializePaymentSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {'error': 'Invalid payment data', 'details': serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        email = serializer.validated_data['email']
+        amount = serializer.validated_data['amount']
+        currency = serializer.validated_data['currency']
+        reference = serializer.validated_data.get('reference')
+
+        # References must stay unique across the hot table and the archive
+        if reference and reference_exists(reference):
+            return Response(
+                {'error': 'A transaction with this reference already exists'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        deferred = request.data.get('deferred', settings.DEFERRED_CHECKOUT)
+        if str(deferred).lower() in ('1', 'true', 'yes'):
+            # Save first, the checkout worker calls Paystack and fills in the checkout details
+            try:
+                transaction = Transaction.objects.create(
+                    user=api_key_obj.user,
+                    api_key=api_key_obj,
+                    reference=reference or generate_reference(),
+                    amount=amount,
+                    currency=currency,
+                    email=email,
+                    status='pending',
+                    checkout_status='queued',
+                    notify_url=serializer.validated_data.get('notify_url', '')
+                )
+            except IntegrityError:
+                return Response(
+                    {'error': 'A transaction with this reference already exists'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            return Response(checkout_result(transaction, request), status=status.HTTP_202_ACCEPTED)
+
         # Initialize payment with Paystack
-        paystack = PaystackService()
-        result = paystack.initialize_transaction(
-            email=email,
-            amount=amount,
-            currency=currency,
-            reference=reference
-        )
+        paystack = get_paystack(api_key_obj)
+        try:
+            result = paystack.initialize_transaction(
+                email=email,
+                amount=amount,
+                currency=currency,
+                reference=reference
+            )
+        except PaystackUnavailable:
+            return Response(PAYSTACK_UNAVAILABLE, status=status.HTTP_502_BAD_GATEWAY)
 
         if result.get('status'):
             # Save transaction to database
             Transaction.objects.create(
+                user=api_key_obj.user,
                 api_key=api_key_obj,
                 reference=result['data']['reference'],
                 amount=amount,
                 currency=currency,
                 email=email,
-                status='pending'
+                status='pending',
+                authorization_url=result['data']['authorization_url'],
+                access_code=result['data']['access_code']
             )
 
             return Response(result, status=status.HTTP_200_OK)
@@ -116,9 +218,94 @@ class InitializePaymentView(APIView):
             return Response(result, status=status.HTTP_400_BAD_REQUEST)
 
 
+class CheckoutStatusView(APIView):
+    @swagger_auto_schema(
+        operation_description="Get the checkout details of a deferred payment, optionally waiting for them",
+        manual_parameters=[
+            openapi.Parameter(
+                'wait',
+                openapi.IN_QUERY,
+                description="Seconds to wait for the checkout to be ready (long poll)",
+                type=openapi.TYPE_INTEGER,
+                required=False,
+                default=0
+            )
+        ],
+        responses={
+            200: openapi.Response(
+                description="Checkout ready (or failed, with status false)",
+                examples={
+                    "application/json": {
+                        "status": True,
+                        "message": "Authorization URL created",
+                        "data": {
+                            "authorization_url": "https://checkout.paystack.com/xxx",
+                            "access_code": "xxx",
+                            "reference": "TXN_xxx"
+                        }
+                    }
+                }
+            ),
+            202: "Still queued - poll the status URL again",
+            404: "Transaction not found",
+            401: "Unauthorized - Invalid API key"
+        }
+    )
+    def get(self, request, reference):
+        # Get API key from header
+        api_key = request.headers.get('X-API-Key')
+
+        if not api_key:
+            return Response(
+                {'error': 'API key is required'},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+
+        # Validate API key
+        try:
+            api_key_obj = APIKey.objects.get(key=api_key, is_active=True)
+        except APIKey.DoesNotExist:
+            return Response(
+                {'error': 'Invalid API key'},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+
+        try:
+            wait = float(request.query_params.get('wait', 0))
+        except ValueError:
+            wait = 0
+        # nan would never compare past the deadline
+        if not math.isfinite(wait):
+            wait = 0
+        wait = min(max(wait, 0), settings.CHECKOUT_LONG_POLL_MAX)
+        deadline = time.monotonic() + wait
+
+        while True:
+            transaction = Transaction.objects.filter(reference=reference, api_key=api_key_obj).only(
+                'reference', 'checkout_status', 'authorization_url', 'access_code', 'checkout_error'
+            ).first()
+            if transaction is None:
+                return Response(
+                    {'error': 'Transaction not found'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            if transaction.checkout_status != 'queued' or time.monotonic() >= deadline:
+                break
+            # Hand the connection back to the pool while we wait; without a pool, closing
+            # would just mean opening a new connection on the next poll
+            if connection.settings_dict.get('OPTIONS', {}).get('pool'):
+                connection.close()
+            time.sleep(0.5)
+
+        if transaction.checkout_status == 'queued':
+            return Response(checkout_result(transaction, request), status=status.HTTP_202_ACCEPTED)
+        return Response(checkout_result(transaction, request), status=status.HTTP_200_OK)
+
+
 class VerifyPaymentView(APIView):
     @swagger_auto_schema(
         operation_description="Verify the status of a payment transaction",
+        manual_parameters=COMPACT_PARAMETERS,
         responses={
             200: openapi.Response(
                 description="Payment verification successful",
@@ -140,6 +327,7 @@ class VerifyPaymentView(APIView):
                     }
                 }
             ),
+            304: "Not Modified - If-None-Match matches the current ETag",
             404: "Transaction not found",
             401: "Unauthorized - Invalid API key"
         }
@@ -163,20 +351,41 @@ class VerifyPaymentView(APIView):
                 status=status.HTTP_401_UNAUTHORIZED
             )
 
+        fields = requested_fields(request, VERIFY_FIELDS)
+        transaction = find_by_reference(reference, api_key=api_key_obj)
+
+        # Answer a matching poll from the local row alone when it can't be stale: settled
+        # transactions never change, and pending ones are trusted for VERIFY_MAX_STALENESS
+        # seconds after the last Paystack check (webhooks keep the status current meanwhile)
+        if transaction is not None and (
+            transaction.status in Transaction.TERMINAL_STATUSES or recently_verified(api_key_obj, reference)
+        ):
+            etag = transaction_etag(transaction, fields)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+
         # Verify payment with Paystack
-        paystack = PaystackService()
-        result = paystack.verify_transaction(reference)
+        paystack = get_paystack(api_key_obj)
+        try:
+            result = paystack.verify_transaction(reference)
+        except PaystackUnavailable:
+            return Response(PAYSTACK_UNAVAILABLE, status=status.HTTP_502_BAD_GATEWAY)
 
         if result.get('status'):
-            # Update transaction in database
-            try:
-                transaction = Transaction.objects.get(reference=reference)
+            # Update transaction in database (archived rows are terminal, leave them alone).
+            # Only save on a real change so updated_at - and the ETag - stay stable.
+            if isinstance(transaction, Transaction) and transaction.status != result['data']['status']:
                 transaction.status = result['data']['status']
-                transaction.save()
-            except Transaction.DoesNotExist:
-                pass
+                transaction.save(update_fields=['status', 'updated_at'])
 
-            return Response(result, status=status.HTTP_200_OK)
+            if transaction is None:
+                return Response(compact_result(result, fields), status=status.HTTP_200_OK)
+
+            mark_verified(api_key_obj, reference)
+            etag = transaction_etag(transaction, fields)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+            return with_etag(Response(compact_result(result, fields), status=status.HTTP_200_OK), etag)
         else:
             return Response(result, status=status.HTTP_404_NOT_FOUND)
 
@@ -200,7 +409,8 @@ class ListTransactionsView(APIView):
                 type=openapi.TYPE_INTEGER,
                 required=False,
                 default=50
-            )
+            ),
+            *COMPACT_PARAMETERS
         ],
         responses={
             200: openapi.Response(
@@ -222,6 +432,7 @@ class ListTransactionsView(APIView):
                     }
                 }
             ),
+            304: "Not Modified - If-None-Match matches the current ETag",
             401: "Unauthorized - Invalid API key"
         }
     )
@@ -248,14 +459,139 @@ class ListTransactionsView(APIView):
         page = request.GET.get('page', 1)
         per_page = request.GET.get('perPage', 50)
 
-        # Get transactions from Paystack
-        paystack = PaystackService()
-        result = paystack.list_transactions(page=page, per_page=per_page)
+        fields = requested_fields(request, LIST_FIELDS)
+
+        # Get transactions from Paystack (briefly cached so polling clients can revalidate cheaply)
+        paystack = get_paystack(api_key_obj)
+        tenant = PaystackClientRegistry.tenant_for(api_key_obj)
+        try:
+            result, upstream_etag = cached_upstream(
+                f'paystack:transactions:{tenant}:{page}:{per_page}',
+                lambda: paystack.list_transactions(page=page, per_page=per_page)
+            )
+        except PaystackUnavailable:
+            return Response(PAYSTACK_UNAVAILABLE, status=status.HTTP_502_BAD_GATEWAY)
+
+        etag = make_etag(upstream_etag, fields)
+        if etag_matches(request, etag):
+            return not_modified(etag)
 
-        return Response(result, status=status.HTTP_200_OK)
+        result = compact_result(result, fields)
+        return with_etag(Response(result, status=status.HTTP_200_OK), etag)
+
+
+class SearchTransactionsView(APIView):
+    @swagger_auto_schema(
+        operation_description="Search your transactions stored locally by reference, email, customer code, amount or date",
+        manual_parameters=[
+            openapi.Parameter('reference', openapi.IN_QUERY, description="Exact reference",
+                              type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter('reference_prefix', openapi.IN_QUERY, description="References starting with this",
+                              type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter('email', openapi.IN_QUERY, description="Customer email (case-insensitive)",
+                              type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter('customer_code', openapi.IN_QUERY, description="Paystack customer code",
+                              type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter('status', openapi.IN_QUERY, description="Transaction status",
+                              type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter('min_amount', openapi.IN_QUERY, description="Minimum amount",
+                              type=openapi.TYPE_NUMBER, required=False),
+            openapi.Parameter('max_amount', openapi.IN_QUERY, description="Maximum amount",
+                              type=openapi.TYPE_NUMBER, required=False),
+            openapi.Parameter('created_after', openapi.IN_QUERY, description="ISO date or datetime",
+                              type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter('created_before', openapi.IN_QUERY, description="ISO date or datetime",
+                              type=openapi.TYPE_STRING, required=False),
+            openapi.Parameter('limit', openapi.IN_QUERY, description="Results per page (max 200)",
+                              type=openapi.TYPE_INTEGER, required=False, default=50),
+            openapi.Parameter('cursor', openapi.IN_QUERY, description="Cursor from the previous page's next/previous link",
+                              type=openapi.TYPE_STRING, required=False),
+        ],
+        responses={
+            200: openapi.Response(
+                description="Matching transactions, newest first",
+                examples={
+                    "application/json": {
+                        "next": "https://paystack-saas.onrender.com/api/payments/search/?cursor=cD0yMDI0",
+                        "previous": None,
+                        "results": [
+                            {
+                                "id": 1,
+                                "reference": "TXN_123456",
+                                "email": "customer@example.com",
+                                "amount": "500.00",
+                                "currency": "GHS",
+                                "status": "success",
+                                "customer_code": "CUS_xxx",
+                                "created_at": "2024-01-01T12:00:00Z"
+                            }
+                        ]
+                    }
+                }
+            ),
+            400: "Bad Request - Invalid filter value",
+            401: "Unauthorized - Invalid API key"
+        }
+    )
+    def get(self, request):
+        # Get API key from header
+        api_key = request.headers.get('X-API-Key')
+
+        if not api_key:
+            return Response(
+                {'error': 'API key is required'},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+
+        # Validate API key
+        try:
+            api_key_obj = APIKey.objects.get(key=api_key, is_active=True)
+        except APIKey.DoesNotExist:
+            return Response(
+                {'error': 'Invalid API key'},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+
+        try:
+            queryset = search_transactions(api_key_obj, request.query_params)
+        except ValueError as exc:
+            return Response(
+                {'error': str(exc)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        paginator = SearchPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        return paginator.get_paginated_response(TransactionSerializer(page, many=True).data)
 
 
 class PaystackWebhookView(APIView):
+    @staticmethod
+    def get_secret(request, api_key_id=None):
+        """Pick the one secret that can have signed this event.
+
+        Returns (secret, api_key), where api_key is None when the platform key
+        was chosen. Clients with their own Paystack account point its webhook
+        at /webhook/<api_key_id>/. On the shared URL we fall back to the API key
+        that created the referenced transaction, then to the platform key.
+        The signature is still checked, so a spoofed id or reference only
+        selects a secret the sender doesn't have - and the event may then only
+        touch transactions belonging to the account whose secret signed it.
+        """
+        api_key = None
+        if api_key_id is not None:
+            api_key = APIKey.objects.filter(pk=api_key_id, is_active=True).first()
+        else:
+            data = request.data.get('data') if isinstance(request.data, dict) else None
+            reference = data.get('reference') if isinstance(data, dict) else None
+            if reference:
+                transaction = find_by_reference(reference)
+                api_key = transaction.api_key if transaction is not None else None
+
+        if api_key is not None and api_key.paystack_secret_encrypted:
+            return api_key.paystack_secret, api_key
+        return config('PAYSTACK_SECRET_KEY', default=''), None
+
     @swagger_auto_schema(
         operation_description="Receive webhook notifications from Paystack for payment events",
         request_body=openapi.Schema(
@@ -277,7 +613,7 @@ class PaystackWebhookView(APIView):
             400: "Invalid signature or bad request"
         }
     )
-    def post(self, request):
+    def post(self, request, api_key_id=None):
         # Verify webhook signature
         paystack_signature = request.headers.get('X-Paystack-Signature')
 
@@ -287,15 +623,20 @@ class PaystackWebhookView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Compute signature
-        secret = config('PAYSTACK_SECRET_KEY')
+        # Compute signature with the secret of the account that sent the event
+        secret, api_key = self.get_secret(request, api_key_id)
+        if not secret:
+            return Response(
+                {'error': 'Invalid signature'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         hash_value = hmac.new(
             secret.encode('utf-8'),
             request.body,
             hashlib.sha512
         ).hexdigest()
 
-        if hash_value != paystack_signature:
+        if not hmac.compare_digest(hash_value, paystack_signature):
             return Response(
                 {'error': 'Invalid signature'},
                 status=status.HTTP_400_BAD_REQUEST
@@ -308,11 +649,14 @@ class PaystackWebhookView(APIView):
         if event == 'charge.success':
             # Update transaction status
             reference = data.get('reference')
-            try:
-                transaction = Transaction.objects.get(reference=reference)
+            if api_key is not None:
+                owner = Q(api_key=api_key)
+            else:
+                # The platform key only vouches for transactions on the platform account
+                owner = Q(api_key__isnull=True) | Q(api_key__paystack_secret_encrypted='')
+            transaction = find_by_reference(reference, owner)
+            if isinstance(transaction, Transaction):
                 transaction.status = 'success'
                 transaction.save()
-            except Transaction.DoesNotExist:
-                pass
 
         return Response({'status': 'success'}, status=status.HTTP_200_OK)
\ No newline at end of file
@@ -45,6 +45,11 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Gzip API responses for clients that accept it (static files are already compressed by WhiteNoise)
+if config('RESPONSE_COMPRESSION', default=True, cast=bool):
+    MIDDLEWARE.insert(MIDDLEWARE.index('whitenoise.middleware.WhiteNoiseMiddleware') + 1,
+                      'django.middleware.gzip.GZipMiddleware')
+
 ROOT_URLCONF = 'paystack_saas.urls'
 
 TEMPLATES = [
@@ -68,13 +73,31 @@ WSGI_APPLICATION = 'paystack_saas.wsgi.application'
 DATABASE_URL = config('DATABASE_URL', default=None)
 
 if DATABASE_URL:
+    DB_POOL = config('DB_POOL', default=True, cast=bool)
+
     # Production: Use PostgreSQL from Render
     DATABASES = {
         'default': dj_database_url.config(
             default=DATABASE_URL,
-            conn_max_age=600
+            # The pool below can't be combined with persistent connections; without it keep them for 10 minutes
+            conn_max_age=0 if DB_POOL else 600,
+            # Ping a connection before it is handed out (by the pool) or reused (persistent),
+            # so a dead one is replaced instead of failing the request
+            conn_health_checks=True
         )
     }
+
+    if DB_POOL:
+        # One pool per worker process; keep DB_POOL_MAX_SIZE * workers under the server's max_connections
+        DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+            'min_size': config('DB_POOL_MIN_SIZE', default=1, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=5, cast=int),
+            # Seconds a request may wait for a free connection before failing
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=float),
+            # Recycle connections after this many seconds, and close ones idle this long
+            'max_lifetime': config('DB_POOL_MAX_LIFETIME', default=1800, cast=float),
+            'max_idle': config('DB_POOL_MAX_IDLE', default=300, cast=float),
+        }
 else:
     # Development: Use SQLite
     DATABASES = {
@@ -114,6 +137,48 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Django REST Framework
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'payments.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'payments.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# Seconds to wait on a Paystack API call before treating it as failed
+PAYSTACK_TIMEOUT = config('PAYSTACK_TIMEOUT', default=15, cast=float)
+
+# Deferred checkout: initialize returns at once and run_checkout_worker talks to Paystack
+DEFERRED_CHECKOUT = config('DEFERRED_CHECKOUT', default=False, cast=bool)
+CHECKOUT_MAX_ATTEMPTS = config('CHECKOUT_MAX_ATTEMPTS', default=5, cast=int)
+CHECKOUT_RETRY_DELAY = config('CHECKOUT_RETRY_DELAY', default=5, cast=int)  # doubles on each retry
+# Margin added to a batch's worst-case duration before a crashed worker's rows are retried
+CHECKOUT_CLAIM_TIMEOUT = config('CHECKOUT_CLAIM_TIMEOUT', default=60, cast=int)
+CHECKOUT_LONG_POLL_MAX = config('CHECKOUT_LONG_POLL_MAX', default=20, cast=int)
+
+# Per-client Paystack secrets: Fernet key used to encrypt them (derived from SECRET_KEY if unset)
+PAYSTACK_CREDENTIALS_KEY = config('PAYSTACK_CREDENTIALS_KEY', default='')
+
+# Paystack clients kept alive per process, and how long an idle one is kept
+PAYSTACK_CLIENT_CACHE_SIZE = config('PAYSTACK_CLIENT_CACHE_SIZE', default=128, cast=int)
+PAYSTACK_CLIENT_IDLE_TIMEOUT = config('PAYSTACK_CLIENT_IDLE_TIMEOUT', default=900, cast=int)
+
+# Seconds to reuse upstream Paystack list responses (and their ETags)
+PAYSTACK_CACHE_TTL = config('PAYSTACK_CACHE_TTL', default=30, cast=int)
+
+# Seconds a pending transaction's local status may answer verify polls (304) without asking Paystack
+VERIFY_MAX_STALENESS = config('VERIFY_MAX_STALENESS', default=30, cast=int)
+
+# Transaction archival
+TRANSACTION_ARCHIVE_AFTER_DAYS = config('TRANSACTION_ARCHIVE_AFTER_DAYS', default=365, cast=int)
+TRANSACTION_ARCHIVE_BATCH_SIZE = config('TRANSACTION_ARCHIVE_BATCH_SIZE', default=1000, cast=int)
+TRANSACTION_ARCHIVE_SLEEP = config('TRANSACTION_ARCHIVE_SLEEP', default=0.5, cast=float)
+
 # CORS settings
 if DEBUG:
     CORS_ALLOW_ALL_ORIGINS = True
@@ -0,0 +1,59 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connections
+from django.test import TestCase
+
+
+class DatabasePoolMetricsTests(TestCase):
+    url = '/metrics/db-pool/'
+
+    def setUp(self):
+        self.staff = User.objects.create_user(username='staff', password='pw', is_staff=True)
+
+    def fake_pool(self, stats):
+        pool = mock.Mock()
+        pool.get_stats.return_value = stats
+        return mock.patch.object(connections['default'], 'pool', pool, create=True)
+
+    def test_staff_only(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+        User.objects.create_user(username='client', password='pw')
+        self.client.login(username='client', password='pw')
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_unpooled_database(self):
+        self.client.force_login(self.staff)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['databases']['default'], {'pooled': False})
+
+    def test_pool_statistics(self):
+        self.client.force_login(self.staff)
+        stats = {'requests_num': 4, 'requests_waiting': 1, 'requests_wait_ms': 10, 'requests_errors': 2}
+
+        with self.fake_pool(stats):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.json()['databases']['default'], {
+            'pooled': True,
+            'checkouts': 4,
+            'waiting': 1,
+            'wait_ms_total': 10,
+            'wait_ms_avg': 2.5,
+            'timeouts': 2,
+            'stats': stats,
+        })
+
+    def test_pool_without_checkouts_yet(self):
+        self.client.force_login(self.staff)
+
+        with self.fake_pool({'pool_size': 1}):
+            response = self.client.get(self.url)
+
+        database = response.json()['databases']['default']
+        self.assertEqual(database['checkouts'], 0)
+        self.assertEqual(database['wait_ms_avg'], 0)
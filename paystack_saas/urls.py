@@ -3,6 +3,7 @@ from django.urls import path, include
 from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
+from .views import DatabasePoolMetricsView
 
 schema_view = get_schema_view(
     openapi.Info(
@@ -19,6 +20,7 @@ schema_view = get_schema_view(
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/payments/', include('payments.urls')),
+    path('metrics/db-pool/', DatabasePoolMetricsView.as_view(), name='db-pool-metrics'),
 
     # Swagger Documentation URLs
     path('', schema_view.with_ui('swagger', cache_timeout=0), name='home'),
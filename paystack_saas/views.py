@@ -0,0 +1,38 @@
+from django.db import connections
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+
+class DatabasePoolMetricsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    @swagger_auto_schema(
+        operation_description="Connection pool statistics for this worker process (staff only)",
+        responses={
+            200: "Pool statistics per database alias",
+            403: "Forbidden - staff only"
+        }
+    )
+    def get(self, request):
+        databases = {}
+        for alias in connections:
+            pool = getattr(connections[alias], 'pool', None)
+            if pool is None:
+                databases[alias] = {'pooled': False}
+                continue
+
+            stats = pool.get_stats()
+            checkouts = stats.get('requests_num', 0)
+            databases[alias] = {
+                'pooled': True,
+                'checkouts': checkouts,
+                'waiting': stats.get('requests_waiting', 0),
+                'wait_ms_total': stats.get('requests_wait_ms', 0),
+                'wait_ms_avg': stats.get('requests_wait_ms', 0) / checkouts if checkouts else 0,
+                'timeouts': stats.get('requests_errors', 0),
+                'stats': stats,
+            }
+
+        return Response({'databases': databases}, status=status.HTTP_200_OK)